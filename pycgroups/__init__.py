@@ -17,12 +17,48 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import os
-import pathlib
-import getpass
-import warnings
+import logging
+import functools
 
 from pycgroups import path as cp
 
+log = logging.getLogger(__name__)
+
+# Key types that are interpreted as a multi-part path
+_SEQ_TYPES = (tuple, list)
+
+# The subsystems used when no subsystems are specified. Looked up on first use.
+_DEFAULT_SUBSYSTEMS = None
+
+
+def _default_subsystems():
+    """
+    :return: A frozenset of all the available subsystems on this machine
+    """
+    global _DEFAULT_SUBSYSTEMS
+    if _DEFAULT_SUBSYSTEMS is None:
+        _DEFAULT_SUBSYSTEMS = frozenset(cp.iter_subsystems())
+    return _DEFAULT_SUBSYSTEMS
+
+
+def _split_path(*path):
+    """
+    :param path: Path components. Each may contain multiple parts.
+    :return: A tuple of all the path parts
+    """
+    return tuple(part for p in path for part in os.fspath(p).split(os.path.sep)
+                 if part and part != os.path.curdir)
+
+
+@functools.lru_cache(maxsize=1)
+def _current_username():
+    """
+    :return: The script's username. It cannot change during the process lifetime.
+    """
+    # Rarely used, so it is only imported when needed
+    import getpass
+    return getpass.getuser()
+
 
 class Cgroup:
     """
@@ -56,15 +92,29 @@ class Cgroup:
     def __init__(self, *path, subsystems=None, create=False):
         """
         :param path: The sub path in the subsystem
+
+        Attributes:
+            path_parts: A tuple of the sub path parts. Should not be modified.
+            path: The full path of the cgroup as string
+            is_root: True if this cgroup is the root of the subsystems
         """
-        self.subsystems = set(cp.iter_subsystems(subsystems))
+        if subsystems is None:
+            self.subsystems = set(_default_subsystems())
+        else:
+            self.subsystems = set(cp.iter_subsystems(subsystems))
 
-        self.path_parts = pathlib.Path(*path).parts
+        self.path_parts = _split_path(*path)
         # First argument of the path might be the subsystem
         if len(self.path_parts) > 0 and self.path_parts[0] in self.subsystems:
             self.subsystems = {self.path_parts[0]}
             self.path_parts = self.path_parts[1:]
 
+        # The path is immutable, so its representations are computed once
+        self.is_root = not self.path_parts
+        self.path = os.path.join(*self.path_parts) if self.path_parts else os.path.sep
+        # Interpreted file keys: {key: ("file", file path)}
+        self._path_cache = {}
+
         ret = cp.supported_subsystems_path(*self.path_parts, lookup_subsystems=self.subsystems, create=create)
         if subsystems is not None:
             missing = self.subsystems.difference(ret)
@@ -73,6 +123,34 @@ class Cgroup:
         else:
             self.subsystems = set(ret)
 
+    @classmethod
+    def _unchecked(cls, path_parts, subsystems):
+        """
+        Create an instance without validating that the path exists in the subsystems.
+        Should only be used when the path is known to exist in these subsystems.
+        :param path_parts: The parts of the sub path in the subsystem
+        :param subsystems: The subsystems that have this path
+        :return: A new instance of this class
+        """
+        obj = cls.__new__(cls)
+        obj.subsystems = set(subsystems)
+        obj.path_parts = tuple(path_parts)
+        obj.is_root = not obj.path_parts
+        obj.path = os.path.join(*obj.path_parts) if obj.path_parts else os.path.sep
+        obj._path_cache = {}
+        return obj
+
+    @classmethod
+    def invalidate_mount_cache(cls):
+        """
+        The available subsystems are looked up once and cached.
+        Call this if subsystems were mounted/unmounted since the first lookup.
+        :return: None
+        """
+        global _DEFAULT_SUBSYSTEMS
+        _DEFAULT_SUBSYSTEMS = None
+        cp.invalidate_subsystem_cache()
+
     ###########################################################################
     # Permissions
     ###########################################################################
@@ -94,7 +172,7 @@ class Cgroup:
         :param group_name: (Optional) A group name
         :return: The script's username
         """
-        user_name = getpass.getuser()
+        user_name = _current_username()
         self.fix_permissions(user_name, group_name)
         return user_name
 
@@ -102,25 +180,13 @@ class Cgroup:
     # Lookup
     ###########################################################################
 
-    @property
-    def path(self):
-        """ Return the full path of the cgroup as string """
-        if self.is_root:
-            return os.path.sep
-        else:
-            return os.path.join(*self.path_parts)
-
-    @property
-    def is_root(self):
-        """ Return if the current cgroup is the root """
-        return not self.path_parts
-
     @property
     def root(self):
         """
         :return: A new instance of this class for the root subsystem path
         """
-        return Cgroup(subsystems=self.subsystems)
+        # The root of a subsystem always exists
+        return Cgroup._unchecked((), self.subsystems)
 
     @property
     def back(self):
@@ -130,8 +196,8 @@ class Cgroup:
         if self.is_root:
             raise ValueError("Cannot go back. Already in the root of the subsystem.")
 
-        return Cgroup(*self.path_parts[:-1],
-                      subsystems=self.subsystems)
+        # The parent exists in all the subsystems that have this cgroup
+        return Cgroup._unchecked(self.path_parts[:-1], self.subsystems)
 
     def subsystem(self, *subsystems, **kwargs):
         """
@@ -179,7 +245,11 @@ class Cgroup:
         groups = cp.subsystems_sub_cgroups(*self.path_parts, lookup_subsystems=subsystems)
 
         for d, s in groups.items():
-            yield self.sub_cgroup(d, subsystems=s, create=create)
+            if create:
+                yield self.sub_cgroup(d, subsystems=s, create=True)
+            else:
+                # The sub cgroups were just listed. No need to validate them again.
+                yield Cgroup._unchecked(self.path_parts + (d,), s)
 
     ###########################################################################
     # Tasks and Processes
@@ -193,7 +263,11 @@ class Cgroup:
         :return: An iterator over cgroup object for the cgroup of the task
         """
         for d, s in cp.task_cgroups(task).items():
-            yield Cgroup(d, subsystems=s, create=False)
+            # Skip the cgroups that are not visible in our cgroups mount (e.g., other namespace)
+            path_parts = _split_path(d)
+            supported = cp.supported_subsystems_path(*path_parts, lookup_subsystems=s)
+            if supported:
+                yield Cgroup._unchecked(path_parts, supported)
 
     @property
     def tasks(self):
@@ -225,27 +299,35 @@ class Cgroup:
         """
         cp.subsystems_add_procs(procs, *self.path_parts, lookup_subsystems=self.subsystems)
 
-    def hierarchy_tasks(self):
+    def add_tasks_bulk(self, data):
         """
-        :return: All the tasks in the cgroup and all its sub cgroups
+        Add tasks to this cgroup folder from a pre-encoded buffer.
+        Avoids converting each task ID when adding many tasks.
+        :param data: A bytes buffer with one task ID per line
+        :return: None
         """
-        task_set = set(self.tasks)
+        cp.subsystems_add_tasks(data, *self.path_parts, lookup_subsystems=self.subsystems)
 
-        for c in self.sub_cgroups():
-            task_set.update(c.hierarchy_tasks())
+    def add_procs_bulk(self, data):
+        """
+        Add processes (Tgid) to this cgroup folder from a pre-encoded buffer.
+        Avoids converting each process ID when adding many processes.
+        :param data: A bytes buffer with one process ID per line
+        :return: None
+        """
+        cp.subsystems_add_procs(data, *self.path_parts, lookup_subsystems=self.subsystems)
 
-        return task_set
+    def hierarchy_tasks(self):
+        """
+        :return: All the tasks in the cgroup and all its sub cgroups
+        """
+        return cp.subsystems_hierarchy_tasks(*self.path_parts, lookup_subsystems=self.subsystems)
 
     def hierarchy_procs(self):
         """
         :return: All the processes in the cgroup and all its sub cgroups
         """
-        proc_set = set(self.procs)
-
-        for c in self.sub_cgroups():
-            proc_set.update(c.hierarchy_procs())
-
-        return proc_set
+        return cp.subsystems_hierarchy_procs(*self.path_parts, lookup_subsystems=self.subsystems)
 
     ###########################################################################
     # Cleanup
@@ -267,7 +349,7 @@ class Cgroup:
         try:
             self.root.add_tasks(*tasks_to_move)
         except Exception as e:
-            warnings.warn(f"Failed to clear tasks: {e}.", RuntimeWarning)
+            log.warning("Failed to clear tasks: %s.", e)
 
     def delete(self, recursive=False):
         """
@@ -280,14 +362,23 @@ class Cgroup:
         if self.is_root:
             raise ValueError("Cannot remove the root cgroup.")
         if recursive:
-            for c in self.sub_cgroups():
-                c.delete(recursive=True)
+            # Collect all the sub cgroups iteratively (each after its parent),
+            # then delete them in reverse order so children are deleted before their parents
+            sub_cgroups = []
+            stack = list(self.sub_cgroups())
+            while stack:
+                c = stack.pop()
+                sub_cgroups.append(c)
+                stack.extend(c.sub_cgroups())
+            for c in reversed(sub_cgroups):
+                c.delete()
 
         failed_subsystems = cp.subsystems_delete_cgroup(*self.path_parts,
                                                         lookup_subsystems=self.subsystems)
         if failed_subsystems:
-            warnings.warn(f"Cannot delete {self.path_parts} on subsystems: {failed_subsystems}.", RuntimeWarning)
+            log.warning("Cannot delete %s on subsystems: %s.", self.path_parts, failed_subsystems)
         self.subsystems = set(failed_subsystems.keys())
+        self._path_cache.clear()
 
     def clear_and_delete(self, recursive=False):
         """
@@ -315,24 +406,84 @@ class Cgroup:
         if self.is_root and key in self.subsystems:
             return self.subsystem(key)
 
-        if type(key) not in (tuple, list):
+        if not isinstance(key, _SEQ_TYPES):
             key = (key,)
 
-        path_type, extra_data = cp.interpret_cgroup_path(*self.path_parts, *key,
-                                                         lookup_subsystems=self.subsystems)
-        # If a file, read it
+        path_type, extra_data = self._read_file(tuple(key))
+        # If a file, return its content
         if path_type == "file":
-            with open(extra_data, "r") as f:
-                return f.read().strip()
+            return extra_data.strip().decode()
         # If create is True, then no need to check if the sub-groups exits
         elif create:
-            return self.sub_cgroup(key, create=True)
+            return self.sub_cgroup(*key, create=True)
         # If some sub-groups exists, use them
         elif path_type == "dir":
-            return self.sub_cgroup(key, subsystems=extra_data)
+            return self.sub_cgroup(*key, subsystems=extra_data)
+        else:
+            return default_value
+
+    def get_bytes(self, key, default_value=None):
+        """
+        Get the content of a file in this cgroup folder without decoding it
+        :param key: The name of the file
+        :param default_value: Return if no file exits with that name
+        :return: The content of the file as bytes
+        """
+        if not isinstance(key, _SEQ_TYPES):
+            key = (key,)
+
+        path_type, extra_data = self._read_file(tuple(key))
+        if path_type == "file":
+            return extra_data.strip()
         else:
             return default_value
 
+    def _read_file(self, key):
+        """
+        Read a file in this cgroup folder.
+        The file path is only resolved on the first read, and then cached.
+        :param key: A tuple of the file path parts
+        :return: ("file", content as bytes) if it is a file. Otherwise, see cp.interpret_cgroup_path().
+        """
+        path_type, extra_data = self._interpret_path(key)
+        if path_type != "file":
+            return path_type, extra_data
+
+        try:
+            return path_type, cp.read_file(extra_data)
+        except FileNotFoundError:
+            if key not in self._path_cache:
+                raise
+            # The cgroup was removed since the path was cached
+            self._invalidate_path_cache(key)
+            return self._read_file(key)
+
+    def _interpret_path(self, key):
+        """
+        Interpret a key in this cgroup folder.
+        Files are cached, so repeated access to the same file will not have to look it up again.
+        Folders are not cached because sub cgroups might be removed or created.
+        :param key: A tuple of the path parts
+        :return: See cp.interpret_cgroup_path()
+        """
+        ret = self._path_cache.get(key)
+        if ret is not None:
+            return ret
+
+        ret = cp.interpret_cgroup_path(*self.path_parts, *key, lookup_subsystems=self.subsystems)
+        if ret[0] == "file":
+            self._path_cache[key] = ret
+        return ret
+
+    def _invalidate_path_cache(self, key=()):
+        """
+        Remove a key and everything under it from the interpreted paths cache
+        :param key: A tuple of the path parts. If empty, the entire cache is cleared.
+        """
+        n = len(key)
+        for k in [k for k in self._path_cache if k[:n] == key]:
+            del self._path_cache[k]
+
     def put(self, key, value):
         """
         Write a content to a cgroup file. If the key is not a file, will raise an exception
@@ -340,19 +491,25 @@ class Cgroup:
         :param value: The content to append
         :return: None
         """
-        if type(key) not in (tuple, list):
+        if not isinstance(key, _SEQ_TYPES):
             key = (key,)
 
-        path_type, extra_data = cp.interpret_cgroup_path(*self.path_parts, *key,
-                                                         lookup_subsystems=self.subsystems)
-        if path_type is 'dir':
+        key = tuple(key)
+        path_type, extra_data = self._interpret_path(key)
+        if path_type == 'dir':
             raise ValueError("Cannot write to a cgroup folder")
         if path_type is None:
             raise ValueError("File does not exist")
 
         # Now we know it is a file
-        with open(extra_data, "w") as f:
-            return f.write("%s\n" % value)
+        try:
+            return cp.write_file(extra_data, f"{value}\n".encode())
+        except FileNotFoundError:
+            if key not in self._path_cache:
+                raise
+            # The cgroup was removed since the path was cached
+            self._invalidate_path_cache(key)
+            return self.put(key, value)
 
     def __getitem__(self, key):
         """ Wrapper for get(). Raise an exception if not found. """
@@ -368,15 +525,17 @@ class Cgroup:
 
     def __delitem__(self, key):
         """ Delete a sub cgroup """
-        if type(key) not in (tuple, list):
+        if not isinstance(key, _SEQ_TYPES):
             key = (key,)
 
-        path_type, extra_data = cp.interpret_cgroup_path(*self.path_parts, *key,
-                                                         lookup_subsystems=self.subsystems)
-        if path_type is 'file':
+        key = tuple(key)
+        # Do not rely on a cached file path, as the file might have been removed since
+        self._invalidate_path_cache(key)
+        path_type, extra_data = self._interpret_path(key)
+        if path_type == 'file':
             raise ValueError("Cannot delete a cgroup file")
         if path_type is None:
             raise ValueError("Sub cgroup does not exist")
 
         # Now we know it is a folder
-        return self.sub_cgroup(key).delete()
+        return self.sub_cgroup(*key).delete()
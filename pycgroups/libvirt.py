@@ -55,6 +55,24 @@ class LibvirtQemuCgroup(Cgroup):
         self.vm_name = vm_name
         path = vm_cgroup_path(vm_name)
         super().__init__(path, subsystems=subsystems, create=False)
+        self._tasks = None
+        self._procs = None
+
+    def refresh(self):
+        """ Forget the cached tasks and processes, so they will be re-read on the next access """
+        self._tasks = None
+        self._procs = None
+
+    def clear_tasks(self, recursive=False):
+        """ Clear the current tasks (not a cached snapshot), and forget the moved tasks """
+        self.refresh()
+        super().clear_tasks(recursive=recursive)
+        self.refresh()
+
+    def delete(self, recursive=False):
+        """ Delete the cgroup, and forget its cached tasks """
+        super().delete(recursive=recursive)
+        self.refresh()
 
     def add_tasks(self, *tasks):
         """ We don't want to add tasks to libvirt cgroup """
@@ -64,12 +82,30 @@ class LibvirtQemuCgroup(Cgroup):
         """ We don't want to add processes to libvirt cgroup """
         raise NotImplementedError('Cannot add processes to a virtual machine cgroup.')
 
+    def add_tasks_bulk(self, data):
+        """ We don't want to add tasks to libvirt cgroup """
+        raise NotImplementedError('Cannot add tasks to a virtual machine cgroup.')
+
+    def add_procs_bulk(self, data):
+        """ We don't want to add processes to libvirt cgroup """
+        raise NotImplementedError('Cannot add processes to a virtual machine cgroup.')
+
     @property
     def tasks(self):
-        """ We want to have all the tasks that belongs to a VM """
-        return super().hierarchy_tasks()
+        """
+        We want to have all the tasks that belongs to a VM.
+        Traversing the VM's cgroups is expensive, so the tasks are read once. Use refresh() to re-read them.
+        """
+        if self._tasks is None:
+            self._tasks = frozenset(super().hierarchy_tasks())
+        return self._tasks
 
     @property
     def procs(self):
-        """ We want to have all the processes that belongs to a VM """
-        return super().hierarchy_procs()
+        """
+        We want to have all the processes that belongs to a VM.
+        Traversing the VM's cgroups is expensive, so the processes are read once. Use refresh() to re-read them.
+        """
+        if self._procs is None:
+            self._procs = frozenset(super().hierarchy_procs())
+        return self._procs
@@ -17,8 +17,9 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import os
-import pathlib
-import subprocess
+import re
+import stat
+import functools
 from typing import Union, Iterable, Optional, Generator, Set, Tuple, List, Dict
 
 from pycgroups.errors import CGroupLookupError, CGroupAccessViolation
@@ -27,6 +28,22 @@ CGROUP_PATH = "/sys/fs/cgroup"
 TASKS_FILE_NAME = "tasks"
 PROCS_FILE_NAME = "cgroup.procs"
 TASK_CGROUP_LIST = "/proc/%s/cgroup"
+# Each line is "hierarchy-ID:subsystems:path". The path itself might contain a colon.
+TASK_CGROUP_LINE = re.compile(rb"^\d+:(?:name=)?([^:\n]*):/*(.*)$", re.M)
+READ_BUFFER_SIZE = 4096
+# Same as open(path, "w"), but cgroup files are never links.
+# Refuse following one to avoid writing outside the cgroup tree.
+WRITE_FLAGS = os.O_WRONLY | os.O_TRUNC | os.O_CLOEXEC | os.O_NOFOLLOW
+CPUSET_INIT_FILES = ('cpuset.mems', 'cpuset.cpus')
+# Number of threads used to access the subsystem hierarchies concurrently.
+# cgroupfs operations are in-memory and usually cheaper than a thread handoff,
+# so this is serial by default.
+MAX_WORKERS = 1
+
+# The cpuset paths that are known to be initialized.
+# Cleared when it reaches the maximal size, so scanning many cgroups will not grow it without bound.
+_initialized_cpusets = set()
+INITIALIZED_CPUSETS_MAX_SIZE = 1024
 
 TYPING_LOOKUP = Union[str, Iterable, None]
 
@@ -35,9 +52,11 @@ TYPING_LOOKUP = Union[str, Iterable, None]
 # Subsystems lookup
 ###########################################################################
 
+@functools.lru_cache(maxsize=1024)
 def subsystem_path(subsystem: str, *path: str) -> str:
     """
-    Generate a path to a subsystem sub path
+    Generate a path to a subsystem sub path.
+    The same paths are generated repeatedly, so recently used paths are cached.
 
     Parameters
     ----------
@@ -54,10 +73,57 @@ def subsystem_path(subsystem: str, *path: str) -> str:
     return os.path.join(CGROUP_PATH, subsystem, *path)
 
 
-def iter_subsystems(lookup_subsystems: TYPING_LOOKUP = None,
-                    include_aliases: bool = False) -> Generator[str, None, None]:
+@functools.lru_cache(maxsize=1)
+def _list_subsystem_dirs() -> Tuple[Tuple[str, bool, Union[int, str]], ...]:
     """
-    Traverse all the available subsystems on this machine.
+    List the subsystem folders mounted on this machine.
+    The result is computed once and cached for the lifetime of the process.
+
+    Returns
+    -------
+    tuple of (str, bool, int or str)
+        The subsystem name, whether it is a subsystem alias (soft link),
+        and a key that identifies its hierarchy.
+        The key is the device of the mount, which is shared by all the mounts of the same hierarchy.
+        If the folder is not a mount point, the key is its real path.
+
+    See Also
+    --------
+    invalidate_subsystem_cache : To re-read the subsystems.
+    """
+    root_real_path = os.path.realpath(CGROUP_PATH)
+    root_dev = os.stat(CGROUP_PATH).st_dev
+    ret = []
+    with os.scandir(CGROUP_PATH) as it:
+        for entry in it:
+            if not entry.is_dir():
+                continue
+            is_link = entry.is_symlink()
+            dev = entry.stat().st_dev
+            if dev != root_dev:
+                key = dev
+            elif is_link:
+                key = os.path.realpath(entry.path)
+            else:
+                key = os.path.join(root_real_path, entry.name)
+            ret.append((entry.name, is_link, key))
+    return tuple(ret)
+
+
+def invalidate_subsystem_cache() -> None:
+    """
+    Clear the cached subsystems list and subsystem paths.
+    Should be called if subsystems were mounted/unmounted after the first lookup.
+    """
+    _list_subsystem_dirs.cache_clear()
+    subsystem_path.cache_clear()
+    _initialized_cpusets.clear()
+
+
+def _filter_subsystem_dirs(lookup_subsystems: TYPING_LOOKUP = None,
+                           include_aliases: bool = False) -> Generator[Tuple[str, str], None, None]:
+    """
+    Filter the cached subsystems list.
 
     Parameters
     ----------
@@ -68,25 +134,122 @@ def iter_subsystems(lookup_subsystems: TYPING_LOOKUP = None,
 
     Yields
     -------
-    str
-        Subsystem names.
+    tuple
+        The subsystem name and the key of its hierarchy.
     """
     if isinstance(lookup_subsystems, str):
         lookup_subsystems = {lookup_subsystems}
     elif lookup_subsystems is not None:
         lookup_subsystems = set(lookup_subsystems)
 
-    for s in os.listdir(CGROUP_PATH):
-        path = subsystem_path(s)
-        if not os.path.isdir(path):
-            continue
-        if not include_aliases and os.path.islink(path):
+    for s, is_link, key in _list_subsystem_dirs():
+        if not include_aliases and is_link:
             continue
         if lookup_subsystems is not None and s not in lookup_subsystems:
             continue
+        yield s, key
+
+
+def iter_subsystems(lookup_subsystems: TYPING_LOOKUP = None,
+                    include_aliases: bool = False) -> Generator[str, None, None]:
+    """
+    Traverse all the available subsystems on this machine.
+
+    Parameters
+    ----------
+    lookup_subsystems: str, iterable, optional
+        The subsystem(s) to lookup.
+    include_aliases: bool
+        If True, will yield subsystem aliases (soft link).
+
+    Yields
+    -------
+    str
+        Subsystem names.
+    """
+    for s, _ in _filter_subsystem_dirs(lookup_subsystems, include_aliases):
         yield s
 
 
+def iter_subsystem_hierarchies(lookup_subsystems: TYPING_LOOKUP = None,
+                               include_aliases: bool = False) -> Generator[Tuple[str, Set[str]], None, None]:
+    """
+    Traverse the distinct hierarchies of the available subsystems on this machine.
+    Subsystems that share a hierarchy (e.g., aliases of co-mounted subsystems or the same hierarchy mounted twice)
+    are yielded together, so their files are only accessed once.
+
+    Parameters
+    ----------
+    lookup_subsystems: str, iterable, optional
+        The subsystem(s) to lookup.
+    include_aliases: bool
+        If True, will include subsystem aliases (soft link).
+
+    Yields
+    -------
+    tuple
+        - A subsystem name that can be used to access the hierarchy
+        - A set of all the subsystem names that share this hierarchy
+    """
+    hierarchies = {}
+    for s, key in _filter_subsystem_dirs(lookup_subsystems, include_aliases):
+        hierarchies.setdefault(key, []).append(s)
+
+    for names in hierarchies.values():
+        yield names[0], set(names)
+
+
+def _map_hierarchies(func, lookup_subsystems: TYPING_LOOKUP = None) -> Generator[Tuple[Set[str], object], None, None]:
+    """
+    Apply a function to each subsystem hierarchy.
+    Uses a thread pool if MAX_WORKERS is larger than 1, otherwise it is applied lazily one by one.
+
+    Parameters
+    ----------
+    func: callable
+        Called with the representative subsystem of each hierarchy.
+        Should not raise, as it will stop the iteration.
+    lookup_subsystems: str, Iterable, optional
+        A list of cgroup subsystem names to lookup.
+
+    Yields
+    -------
+    tuple
+        The subsystem names of the hierarchy and the function result.
+    """
+    hierarchies = list(iter_subsystem_hierarchies(lookup_subsystems))
+    workers = min(MAX_WORKERS, len(hierarchies))
+    if workers <= 1:
+        for s, names in hierarchies:
+            yield names, func(s)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from zip((names for _, names in hierarchies), pool.map(func, (s for s, _ in hierarchies)))
+
+
+def subsystem_paths(*path: str, lookup_subsystems: TYPING_LOOKUP = None,
+                    include_aliases: bool = False) -> Tuple[str, ...]:
+    """
+    All the available subsystem paths on this machine.
+    Can be reused by callers that traverse the same paths multiple times.
+
+    Parameters
+    ----------
+    lookup_subsystems: str, iterable, optional
+        The subsystem(s) to lookup.
+    include_aliases: bool
+        If True, will include subsystem aliases (soft link).
+
+    Returns
+    -------
+    tuple of str
+        Subsystem paths.
+    """
+    return tuple(subsystem_path(s, *path) for s in iter_subsystems(lookup_subsystems, include_aliases))
+
+
 def iter_subsystem_path(*path: str, lookup_subsystems: TYPING_LOOKUP = None,
                         include_aliases: bool = False) -> Generator[str, None, None]:
     """
@@ -103,9 +266,12 @@ def iter_subsystem_path(*path: str, lookup_subsystems: TYPING_LOOKUP = None,
     -------
     str
         Subsystem paths.
+
+    See Also
+    --------
+    subsystem_paths : For more information.
     """
-    for s in iter_subsystems(lookup_subsystems, include_aliases):
-        yield subsystem_path(s, *path)
+    yield from subsystem_paths(*path, lookup_subsystems=lookup_subsystems, include_aliases=include_aliases)
 
 
 def validate_subsystem_path(subsystem: str, *path: str, create: bool = False) -> str:
@@ -132,22 +298,51 @@ def validate_subsystem_path(subsystem: str, *path: str, create: bool = False) ->
         If the path leads to a file or the folder does not exists.
     """
     sub_path = subsystem_path(subsystem, *path)
-    if os.path.isfile(sub_path):
-        raise CGroupLookupError(None, CGroupLookupError.Type.FILE_INSTEAD_OF_FOLDER, sub_path)
-    elif not os.path.isdir(sub_path):
+    try:
+        mode = os.stat(sub_path).st_mode
+    except OSError:
+        mode = 0
+
+    if stat.S_ISREG(mode):
+        raise CGroupLookupError(None, CGroupLookupError.Type.FILE_INSTEAD_OF_GROUP, sub_path)
+    elif not stat.S_ISDIR(mode):
         if not create:
             raise CGroupLookupError(None, CGroupLookupError.Type.GROUP_NOT_EXISTS, sub_path)
 
         os.makedirs(sub_path, exist_ok=True)
+        _initialized_cpusets.discard(sub_path)
 
     # Fix bug in cpuset (might be solved using cgroup.clone_children)
-    if subsystem == 'cpuset':
-        init_cgroup_settings_from_parents(subsystem, *path,
-                                          file_list=['cpuset.mems', 'cpuset.cpus'])
+    if subsystem == 'cpuset' and sub_path not in _initialized_cpusets:
+        if not _is_cpuset_initialized(sub_path):
+            init_cgroup_settings_from_parents(subsystem, *path, file_list=CPUSET_INIT_FILES)
+        if len(_initialized_cpusets) >= INITIALIZED_CPUSETS_MAX_SIZE:
+            _initialized_cpusets.clear()
+        _initialized_cpusets.add(sub_path)
 
     return sub_path
 
 
+def _is_cpuset_initialized(sub_path: str) -> bool:
+    """
+    Check if the cpuset files of a cgroup are set.
+
+    Parameters
+    ----------
+    sub_path: str
+        The full path of a cpuset cgroup.
+
+    Returns
+    -------
+    bool
+        True if all the cpuset initialization files exist and are not empty.
+    """
+    try:
+        return all(read_file(os.path.join(sub_path, f)).strip() for f in CPUSET_INIT_FILES)
+    except FileNotFoundError:
+        return False
+
+
 def supported_subsystems_path(*path: str, lookup_subsystems: TYPING_LOOKUP = None, create: bool = False) -> Set[str]:
     """
     Return a list of subsystem that have a specific path.
@@ -168,12 +363,16 @@ def supported_subsystems_path(*path: str, lookup_subsystems: TYPING_LOOKUP = Non
     """
     supported = set()
 
-    for s in iter_subsystems(lookup_subsystems):
-        try:
-            validate_subsystem_path(s, *path, create=create)
-            supported.add(s)
-        except CGroupLookupError:
-            pass
+    for s, names in iter_subsystem_hierarchies(lookup_subsystems):
+        # Only creating a path or the cpuset initialization requires the full validation
+        if create or s == 'cpuset':
+            try:
+                validate_subsystem_path(s, *path, create=create)
+                supported.update(names)
+            except CGroupLookupError:
+                pass
+        elif os.path.isdir(subsystem_path(s, *path)):
+            supported.update(names)
 
     return supported
 
@@ -182,6 +381,30 @@ def supported_subsystems_path(*path: str, lookup_subsystems: TYPING_LOOKUP = Non
 # Cgroup lookup
 ###########################################################################
 
+def cgroups_content_iter(subsystem: str, *path: str) -> Generator[Tuple[str, bool], None, None]:
+    """
+    Traverse the content of a cgroup.
+
+    Parameters
+    ----------
+    subsystem: str
+        The subsystem to check.
+    path: str
+        The path to check.
+
+    Yields
+    ------
+    tuple:
+        - The name of a sub cgroup or a file of the cgroup
+        - True if it is a sub cgroup, False if it is a file
+    """
+    full_path = subsystem_path(subsystem, *path)
+    # The entry type is known from the directory listing, so no stat is needed
+    with os.scandir(full_path) as it:
+        for entry in it:
+            yield entry.name, entry.is_dir(follow_symlinks=False)
+
+
 def cgroups_content(subsystem: str, *path: str) -> Tuple[List[str], List[str]]:
     """
     The content of a cgroup.
@@ -199,8 +422,12 @@ def cgroups_content(subsystem: str, *path: str) -> Tuple[List[str], List[str]]:
         - list of the names of all the sub cgroups of this cgroup
         - list of the files supported by the cgroup
     """
-    full_path = subsystem_path(subsystem, *path)
-    path, dirs, files = next(os.walk(full_path))
+    dirs, files = [], []
+    for name, is_dir in cgroups_content_iter(subsystem, *path):
+        if is_dir:
+            dirs.append(name)
+        else:
+            files.append(name)
     return dirs, files
 
 
@@ -220,7 +447,7 @@ def sub_cgroups(subsystem: str, *path: str) -> List[str]:
     list
         A list of the names of all the sub cgroups in this cgroup.
     """
-    return cgroups_content(subsystem, *path)[0]
+    return [name for name, is_dir in cgroups_content_iter(subsystem, *path) if is_dir]
 
 
 def cgroup_files(subsystem: str, *path: str) -> List[str]:
@@ -239,7 +466,7 @@ def cgroup_files(subsystem: str, *path: str) -> List[str]:
     list
         A list of the files supported by this cgroup.
     """
-    return cgroups_content(subsystem, *path)[1]
+    return [name for name, is_dir in cgroups_content_iter(subsystem, *path) if not is_dir]
 
 
 def subsystems_sub_cgroups(*path: str, lookup_subsystems: TYPING_LOOKUP = None) -> Dict[str, Set[str]]:
@@ -258,13 +485,16 @@ def subsystems_sub_cgroups(*path: str, lookup_subsystems: TYPING_LOOKUP = None)
     dict
        The names of all the sub cgroups of this cgroup with a set of subsystems that includes them.
     """
+    def list_dirs(s):
+        # Single listing per hierarchy. Files are skipped without building a list of them.
+        # When serial, the listing is streamed into the merge. A thread must return the full list.
+        dirs = (name for name, is_dir in cgroups_content_iter(s, *path) if is_dir)
+        return dirs if MAX_WORKERS <= 1 else list(dirs)
+
     ret = {}
-    for s in iter_subsystems(lookup_subsystems):
-        for sub_path in sub_cgroups(s, *path):
-            if sub_path in ret:
-                ret[sub_path].add(s)
-            else:
-                ret[sub_path] = {s}
+    for names, dirs in _map_hierarchies(list_dirs, lookup_subsystems):
+        for name in dirs:
+            ret.setdefault(name, set()).update(names)
     return ret
 
 
@@ -294,33 +524,95 @@ def interpret_cgroup_path(*path: str,
     CGroupLookupError
         If there is ambiguity.
     """
-    subsystems = list(iter_subsystems(lookup_subsystems))
-    paths = [subsystem_path(s, *path) for s in subsystems]
+    full_path = os.path.join(*path)
+    file_path = None
+    include_subsystems = set()
 
-    is_file = [os.path.isfile(p) for p in paths]
-    is_file_count = is_file.count(True)
+    # A single stat per subsystem. Ambiguity is detected as soon as it is found.
+    for s, names in iter_subsystem_hierarchies(lookup_subsystems):
+        p = subsystem_path(s, *path)
+        try:
+            mode = os.stat(p).st_mode
+        except OSError:
+            continue
 
-    is_dir = [os.path.isdir(p) for p in paths]
-    is_dir_count = is_dir.count(True)
+        if stat.S_ISREG(mode):
+            if include_subsystems:
+                raise CGroupLookupError(None, CGroupLookupError.Type.AMBIGUITY_FILE_OR_GROUP, full_path)
+            if file_path is not None:
+                raise CGroupLookupError(None, CGroupLookupError.Type.AMBIGUITY_MULTI_FILES, full_path)
+            file_path = p
+        elif stat.S_ISDIR(mode):
+            if file_path is not None:
+                raise CGroupLookupError(None, CGroupLookupError.Type.AMBIGUITY_FILE_OR_GROUP, full_path)
+            include_subsystems.update(names)
+
+    if file_path is not None:
+        return "file", file_path
+
+    if include_subsystems:
+        return "dir", include_subsystems
 
-    # First, lets detect if there is ambiguity
-    full_path = os.path.join(*path)
-    if is_dir_count > 0 and is_file_count > 0:
-        raise CGroupLookupError(None, CGroupLookupError.Type.AMBIGUITY_FILE_OR_GROUP, full_path)
-    if is_file_count > 1:
-        raise CGroupLookupError(None, CGroupLookupError.Type.AMBIGUITY_MULTI_FILES, full_path)
+    return None, None
 
-    if is_file_count == 1:
-        i = is_file.index(True)
-        return "file", paths[i]
 
-    # At this point, we know that it is not a file
+###########################################################################
+# Files
+###########################################################################
 
-    if is_dir_count > 0:
-        include_subsystems = {s for s, d in zip(subsystems, is_dir) if d}
-        return "dir", include_subsystems
+def read_file(file_path: str, dir_fd: Optional[int] = None) -> bytes:
+    """
+    Read the content of a cgroup file.
+    Uses a raw file descriptor to avoid the overhead of buffered text IO.
 
-    return None, None
+    Parameters
+    ----------
+    file_path: str
+        The full path of the file.
+    dir_fd: int, optional
+        A folder file descriptor. If given, the file path is relative to this folder.
+
+    Returns
+    -------
+    bytes
+        The content of the file.
+    """
+    fd = os.open(file_path, os.O_RDONLY, dir_fd=dir_fd)
+    try:
+        # A short read is not the end of the file: multi-record kernel files (e.g., tasks)
+        # return at most a page of whole records per read. Only an empty read is the end.
+        chunks = []
+        data = os.read(fd, READ_BUFFER_SIZE)
+        while data:
+            chunks.append(data)
+            data = os.read(fd, READ_BUFFER_SIZE)
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+
+def write_file(file_path: str, data: bytes) -> int:
+    """
+    Write to a cgroup file.
+    Uses a raw file descriptor to avoid the overhead of buffered text IO.
+
+    Parameters
+    ----------
+    file_path: str
+        The full path of the file.
+    data: bytes
+        The data to write.
+
+    Returns
+    -------
+    int
+        The number of bytes written.
+    """
+    fd = os.open(file_path, WRITE_FLAGS)
+    try:
+        return os.write(fd, data)
+    finally:
+        os.close(fd)
 
 
 ###########################################################################
@@ -344,11 +636,14 @@ def fix_permissions(*path: str, lookup_subsystems: TYPING_LOOKUP = None,
     group_name: str, optional
         The new owner group.
     """
+    # Rarely used, so it is only imported when needed
+    import subprocess
+
     owner = str(user_name)
     if group_name:
         owner = '%s:%s' % (user_name, group_name)
 
-    paths = (subsystem_path(s, *path) for s in iter_subsystems(lookup_subsystems))
+    paths = (subsystem_path(s, *path) for s, _ in iter_subsystem_hierarchies(lookup_subsystems))
     for p in paths:
         # sudo:
         # -k, --reset-timestamp         invalidate timestamp file
@@ -402,15 +697,36 @@ def _normalize_process_id_list(proc_ids: Union[str, int, Iterable[str], Iterable
     list, tuple
         Of process/tasks IDs.
     """
-    try:
+    if isinstance(proc_ids, (str, int)):
         return [_normalize_process_id(proc_ids)]
-    except ValueError:
-        return [_normalize_process_id(i) for i in proc_ids]
+    # Strings are the common case and need no conversion
+    return [i if isinstance(i, str) else _normalize_process_id(i) for i in proc_ids]
+
+
+def _encode_process_id_list(proc_ids: Union[str, int, bytes, Iterable[str], Iterable[int]]) -> List[bytes]:
+    """
+    Encode the process/task IDs to be written to a cgroup file.
+
+    Parameters
+    ----------
+    proc_ids: str, int, bytes, Iterable of str, Iterable of int
+        A process/task ID or an iterable of these.
+        Or a pre-encoded bytes buffer with one ID per line.
+
+    Returns
+    -------
+    list of bytes
+        The process/tasks IDs, each terminated by a new line.
+    """
+    if isinstance(proc_ids, bytes):
+        return [p + b"\n" for p in proc_ids.split()]
+    return [f"{p}\n".encode() for p in _normalize_process_id_list(proc_ids)]
 
 
 def _cgroup_procs(fname: str, subsystem: str, *path: str) -> Generator[str, None, None]:
     """
     Traverse the process/tasks of a cgroup.
+    The file is read lazily, so a consumer that stops early does not read all of it.
 
     Parameters
     ----------
@@ -425,16 +741,41 @@ def _cgroup_procs(fname: str, subsystem: str, *path: str) -> Generator[str, None
     ------
     str
         Process/task ID.
+
+    See Also
+    --------
+    _cgroup_procs_set : To read all the process/tasks at once.
     """
     file_path = subsystem_path(subsystem, *path, fname)
     with open(file_path, "r") as f:
-        proc_lines = f.readlines()
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def _cgroup_procs_set(fname: str, subsystem: str, *path: str) -> Set[str]:
+    """
+    The process/tasks of a cgroup.
+    The whole file is read at once (it might span several reads), then split into a set.
+
+    Parameters
+    ----------
+    fname: str
+        The file name to read from (tasks or procs).
+    subsystem: str
+        The subsystem to check.
+    path: str
+        The path to check.
 
-    for p in proc_lines:
-        yield p.strip()
+    Returns
+    -------
+    set
+        Process/task IDs.
+    """
+    file_path = subsystem_path(subsystem, *path, fname)
+    return set(read_file(file_path).decode().split())
 
 
-def _add_procs(fname: str, subsystem: str, proc_ids: Union[str, int, Iterable[str], Iterable[int]],
+def _add_procs(fname: str, subsystem: str, proc_ids: Union[str, int, bytes, Iterable[str], Iterable[int]],
                *path: str) -> None:
     """
     Add process/task IDs to subsystem path.
@@ -445,18 +786,44 @@ def _add_procs(fname: str, subsystem: str, proc_ids: Union[str, int, Iterable[st
         The file name to read from (tasks or procs).
     subsystem: str
         The subsystem to check.
-    proc_ids: str, int, Iterable of str, Iterable of int
+    proc_ids: str, int, bytes, Iterable of str, Iterable of int
         A process/task ID or an iterable of these.
+        Or a pre-encoded bytes buffer with one ID per line.
+    path: str
+        The path to check.
+    """
+    _write_procs(fname, subsystem, _encode_process_id_list(proc_ids), *path)
+
+
+def _write_procs(fname: str, subsystem: str, proc_lines: List[bytes], *path: str) -> None:
+    """
+    Write encoded process/task IDs to subsystem path.
+
+    Parameters
+    ----------
+    fname: str
+        The file name to write to (tasks or procs).
+    subsystem: str
+        The subsystem to check.
+    proc_lines: list of bytes
+        Encoded process/task IDs, each terminated by a new line.
     path: str
         The path to check.
     """
     file_path = subsystem_path(subsystem, *path, fname)
-    for p in _normalize_process_id_list(proc_ids):
-        with open(file_path, "w") as f:
-            f.write(f"{p}\n")
+    # The file is opened once for all the writes. The IDs cannot be joined into a single write:
+    # the kernel parses each write as one ID and rejects a buffer with multiple IDs.
+    # Each write migrates a task synchronously inside the kernel, so submitting them in a batch
+    # (e.g., io_uring) would not save the migration cost, only the (cheap) syscall entry.
+    fd = os.open(file_path, WRITE_FLAGS)
+    try:
+        for line in proc_lines:
+            os.write(fd, line)
+    finally:
+        os.close(fd)
 
 
-def _subsystems_add_procs(fname: str, proc_ids: Union[str, int, Iterable[str], Iterable[int]], *path: str,
+def _subsystems_add_procs(fname: str, proc_ids: Union[str, int, bytes, Iterable[str], Iterable[int]], *path: str,
                           lookup_subsystems: TYPING_LOOKUP = None) -> None:
     """
     Add process/task IDs to all subsystems path.
@@ -465,8 +832,9 @@ def _subsystems_add_procs(fname: str, proc_ids: Union[str, int, Iterable[str], I
     ----------
     fname: str
         The file name to read from (tasks or procs).
-    proc_ids: str, int, Iterable of str, Iterable of int
+    proc_ids: str, int, bytes, Iterable of str, Iterable of int
         A process/task ID or an iterable of these.
+        Or a pre-encoded bytes buffer with one ID per line.
     path: str
         The path to check.
     lookup_subsystems: str, Iterable, optional
@@ -477,12 +845,19 @@ def _subsystems_add_procs(fname: str, proc_ids: Union[str, int, Iterable[str], I
     CGroupAccessViolation
         If Failed to add processes/tasks.
     """
-    failed = {}
-    for s in iter_subsystems(lookup_subsystems):
+    # Encode the IDs once for all the subsystems
+    proc_lines = _encode_process_id_list(proc_ids)
+
+    def write(s):
         try:
-            _add_procs(fname, s, proc_ids, *path)
+            _write_procs(fname, s, proc_lines, *path)
         except Exception as e:
-            failed[s] = str(e)
+            return str(e)
+
+    failed = {}
+    for names, err in _map_hierarchies(write, lookup_subsystems):
+        if err is not None:
+            failed.update(dict.fromkeys(names, err))
 
     if failed:
         raise CGroupAccessViolation(None, CGroupAccessViolation.Type.FAILED_WRITE, failed)
@@ -508,11 +883,85 @@ def _subsystems_cgroup_procs_intersection(fname: str, *path: str, lookup_subsyst
 
     See Also
     --------
-    _cgroup_procs : For more information.
+    _cgroup_procs_set : For more information.
+    """
+    ret = None
+    for _, procs in _map_hierarchies(lambda s: _cgroup_procs_set(fname, s, *path), lookup_subsystems):
+        if ret is None:
+            ret = procs
+        else:
+            ret.intersection_update(procs)
+        # No need to read the other subsystems if the intersection is already empty
+        if not ret:
+            break
+    return ret if ret is not None else set()
+
+
+def _walk_cgroup_procs(fname: str, subsystem: str, *path: str) -> Generator[Tuple[str, Set[str]], None, None]:
+    """
+    Traverse the process/tasks of a cgroup and all its sub cgroups in a single walk.
+    Each folder is opened relative to its parent's file descriptor to avoid resolving the full path.
+
+    Parameters
+    ----------
+    fname: str
+        The file name to read from (tasks or procs).
+    subsystem: str
+        The subsystem to check.
+    path: str
+        The path to start from.
+
+    Yields
+    ------
+    tuple
+        - The path of the cgroup, relative to the given path
+        - A set of its process/task IDs
+    """
+    top = subsystem_path(subsystem, *path)
+    for root, _, _, root_fd in os.fwalk(top):
+        try:
+            # read_file reads until the end, as the tasks file might span more than a page
+            data = read_file(fname, dir_fd=root_fd)
+        except FileNotFoundError:
+            # The cgroup was removed during the walk
+            continue
+        yield os.path.relpath(root, top), set(data.decode().split())
+
+
+def _subsystems_hierarchy_procs(fname: str, *path: str, lookup_subsystems: TYPING_LOOKUP = None) -> Set[str]:
     """
+    The processes/tasks that belong to this path or any of its sub cgroups.
+    For each cgroup, only the processes/tasks that belong to it in all the subsystems that have it are included.
+
+    Parameters
+    ----------
+    fname: str
+        The file name to read from (tasks or procs).
+    path: str
+        The path to check.
+    lookup_subsystems: str, Iterable, optional
+        A list of cgroup subsystem names to lookup.
+
+    Returns
+    -------
+    set
+        Process/task IDs.
+
+    See Also
+    --------
+    _walk_cgroup_procs : For more information.
+    """
+    cgroups_procs = {}
+    for s, _ in iter_subsystem_hierarchies(lookup_subsystems):
+        for sub_path, procs in _walk_cgroup_procs(fname, s, *path):
+            if sub_path in cgroups_procs:
+                cgroups_procs[sub_path].intersection_update(procs)
+            else:
+                cgroups_procs[sub_path] = procs
+
     ret = set()
-    for s in iter_subsystems(lookup_subsystems):
-        ret.intersection_update(_cgroup_procs(fname, s, *path))
+    for procs in cgroups_procs.values():
+        ret.update(procs)
     return ret
 
 
@@ -536,18 +985,11 @@ def task_cgroups(task: Union[str, int]) -> Dict[str, Set[str]]:
             }
     """
     proc_path = TASK_CGROUP_LIST % _normalize_process_id(task)
-    with open(proc_path, "r") as f:
-        data = f.readlines()
+    data = read_file(proc_path)
 
     res = {}
-    for l in data:
-        _, subsystem, path = l.strip().split(":")
-        subsystem = subsystem.lstrip('name=')
-        path = path.lstrip(os.path.sep)
-        if path in res:
-            res[path].add(subsystem)
-        else:
-            res[path] = {subsystem}
+    for subsystem, path in TASK_CGROUP_LINE.findall(data):
+        res.setdefault(path.decode(), set()).add(subsystem.decode())
 
     return res
 
@@ -598,7 +1040,7 @@ def cgroup_procs(subsystem: str, *path: str) -> Generator[str, None, None]:
     yield from _cgroup_procs(PROCS_FILE_NAME, subsystem, *path)
 
 
-def add_tasks(subsystem: str, task_ids: Union[str, int, Iterable[str], Iterable[int]], *path: str) -> None:
+def add_tasks(subsystem: str, task_ids: Union[str, int, bytes, Iterable[str], Iterable[int]], *path: str) -> None:
     """
     Add task IDs to subsystem path.
 
@@ -606,8 +1048,9 @@ def add_tasks(subsystem: str, task_ids: Union[str, int, Iterable[str], Iterable[
     ----------
     subsystem: str
         The subsystem to check.
-    task_ids: str, int, Iterable of str, Iterable of int
+    task_ids: str, int, bytes, Iterable of str, Iterable of int
         A task ID or an iterable of these.
+        Or a pre-encoded bytes buffer with one ID per line.
     path: str
         The path to check.
 
@@ -618,7 +1061,7 @@ def add_tasks(subsystem: str, task_ids: Union[str, int, Iterable[str], Iterable[
     _add_procs(TASKS_FILE_NAME, subsystem, task_ids, *path)
 
 
-def add_procs(subsystem: str, proc_ids: Union[str, int, Iterable[str], Iterable[int]], *path: str) -> None:
+def add_procs(subsystem: str, proc_ids: Union[str, int, bytes, Iterable[str], Iterable[int]], *path: str) -> None:
     """
     Add process IDs to subsystem path.
 
@@ -626,8 +1069,9 @@ def add_procs(subsystem: str, proc_ids: Union[str, int, Iterable[str], Iterable[
     ----------
     subsystem: str
         The subsystem to check.
-    proc_ids: str, int, Iterable of str, Iterable of int
+    proc_ids: str, int, bytes, Iterable of str, Iterable of int
         A process ID or an iterable of these.
+        Or a pre-encoded bytes buffer with one ID per line.
     path: str
         The path to check.
 
@@ -638,15 +1082,16 @@ def add_procs(subsystem: str, proc_ids: Union[str, int, Iterable[str], Iterable[
     _add_procs(PROCS_FILE_NAME, subsystem, proc_ids, *path)
 
 
-def subsystems_add_tasks(task_ids: Union[str, int, Iterable[str], Iterable[int]], *path: str,
+def subsystems_add_tasks(task_ids: Union[str, int, bytes, Iterable[str], Iterable[int]], *path: str,
                          lookup_subsystems: TYPING_LOOKUP = None) -> None:
     """
     Add task IDs to all subsystems path.
 
     Parameters
     ----------
-    task_ids: str, int, Iterable of str, Iterable of int
+    task_ids: str, int, bytes, Iterable of str, Iterable of int
         A task ID or an iterable of these.
+        Or a pre-encoded bytes buffer with one ID per line.
     path: str
         The path to check.
     lookup_subsystems: str, Iterable, optional
@@ -664,15 +1109,16 @@ def subsystems_add_tasks(task_ids: Union[str, int, Iterable[str], Iterable[int]]
     _subsystems_add_procs(TASKS_FILE_NAME, task_ids, *path, lookup_subsystems=lookup_subsystems)
 
 
-def subsystems_add_procs(proc_ids: Union[str, int, Iterable[str], Iterable[int]], *path: str,
+def subsystems_add_procs(proc_ids: Union[str, int, bytes, Iterable[str], Iterable[int]], *path: str,
                          lookup_subsystems: TYPING_LOOKUP = None) -> None:
     """
     Add process IDs to all subsystems path.
 
     Parameters
     ----------
-    proc_ids: str, int, Iterable of str, Iterable of int
+    proc_ids: str, int, bytes, Iterable of str, Iterable of int
         A process ID or an iterable of these.
+        Or a pre-encoded bytes buffer with one ID per line.
     path: str
         The path to check.
     lookup_subsystems: str, Iterable, optional
@@ -738,11 +1184,57 @@ def subsystems_cgroup_procs(*path: str, lookup_subsystems: TYPING_LOOKUP = None)
     return _subsystems_cgroup_procs_intersection(PROCS_FILE_NAME, *path, lookup_subsystems=lookup_subsystems)
 
 
+def subsystems_hierarchy_tasks(*path: str, lookup_subsystems: TYPING_LOOKUP = None) -> Set[str]:
+    """
+    The tasks that belong to this path or any of its sub cgroups in all subsystem
+
+    Parameters
+    ----------
+    path: str
+        The path to check.
+    lookup_subsystems: str, Iterable, optional
+        A list of cgroup subsystem names to lookup.
+
+    Returns
+    -------
+    set
+        Task IDs.
+
+    See Also
+    --------
+    _subsystems_hierarchy_procs : For more information.
+    """
+    return _subsystems_hierarchy_procs(TASKS_FILE_NAME, *path, lookup_subsystems=lookup_subsystems)
+
+
+def subsystems_hierarchy_procs(*path: str, lookup_subsystems: TYPING_LOOKUP = None) -> Set[str]:
+    """
+    The processes that belong to this path or any of its sub cgroups in all subsystem
+
+    Parameters
+    ----------
+    path: str
+        The path to check.
+    lookup_subsystems: str, Iterable, optional
+        A list of cgroup subsystem names to lookup.
+
+    Returns
+    -------
+    set
+        Process IDs.
+
+    See Also
+    --------
+    _subsystems_hierarchy_procs : For more information.
+    """
+    return _subsystems_hierarchy_procs(PROCS_FILE_NAME, *path, lookup_subsystems=lookup_subsystems)
+
+
 ###########################################################################
 # Cleanup
 ###########################################################################
 
-def delete_cgroup(subsystem: str, *path: str) -> None:
+def delete_cgroup(subsystem: str, *path: str, parents: bool = False) -> None:
     """
     Delete a cgroup.
 
@@ -752,22 +1244,42 @@ def delete_cgroup(subsystem: str, *path: str) -> None:
         The subsystem to use.
     path: str
         The path to delete.
+    parents: bool
+        If True, will also remove its parents if they are empty (up to the subsystem's root).
 
     Raises
     ------
     CGroupLookupError
+        If the path is not a cgroup.
+    OSError
         If fail to delete (if it is not empty for example).
-        Will also try to remove its parents if they are empty.
     """
     cgroup_path = subsystem_path(subsystem, *path)
-    if os.path.isfile(cgroup_path):
-        raise CGroupLookupError(None, CGroupLookupError.Type.FILE_INSTEAD_OF_GROUP, cgroup_path)
-    if os.path.islink(cgroup_path):
-        raise CGroupLookupError(None, CGroupLookupError.Type.LINK, cgroup_path)
-    if not os.path.exists(cgroup_path):
+    try:
+        mode = os.lstat(cgroup_path).st_mode
+    except OSError:
         raise CGroupLookupError(None, CGroupLookupError.Type.NOT_EXISTS, cgroup_path)
 
-    os.removedirs(cgroup_path)
+    if stat.S_ISLNK(mode):
+        raise CGroupLookupError(None, CGroupLookupError.Type.LINK, cgroup_path)
+    if stat.S_ISREG(mode):
+        raise CGroupLookupError(None, CGroupLookupError.Type.FILE_INSTEAD_OF_GROUP, cgroup_path)
+
+    os.rmdir(cgroup_path)
+    _initialized_cpusets.discard(cgroup_path)
+    if not parents:
+        return
+
+    root_path = subsystem_path(subsystem)
+    parent_path = os.path.dirname(os.path.normpath(cgroup_path))
+    while parent_path.startswith(root_path + os.path.sep):
+        try:
+            os.rmdir(parent_path)
+        except OSError:
+            # Not empty (or still in use), so its parents are not empty either
+            break
+        _initialized_cpusets.discard(parent_path)
+        parent_path = os.path.dirname(parent_path)
 
 
 def subsystems_delete_cgroup(*path: str, lookup_subsystems: TYPING_LOOKUP = None) -> Dict[str, str]:
@@ -786,12 +1298,16 @@ def subsystems_delete_cgroup(*path: str, lookup_subsystems: TYPING_LOOKUP = None
     dict
         Failed deletes and reasons.
     """
-    failed = {}
-    for s in iter_subsystems(lookup_subsystems):
+    def delete(s):
         try:
             delete_cgroup(s, *path)
         except Exception as e:
-            failed[s] = str(e)
+            return str(e)
+
+    failed = {}
+    for names, err in _map_hierarchies(delete, lookup_subsystems):
+        if err is not None:
+            failed.update(dict.fromkeys(names, err))
 
     return failed
 
@@ -835,14 +1351,12 @@ def init_cgroup_default(subsystem: str, *path: str, default_data: Optional[dict]
         if not os.path.exists(full_path):
             raise CGroupLookupError(None, CGroupLookupError.Type.NOT_EXISTS, full_path)
 
-        with open(full_path, "r") as fp:
-            current_data = fp.read().strip()
+        current_data = read_file(full_path).decode().strip()
 
         if current_data is not None and current_data != "":
             output_data[file_name] = current_data
         else:
-            with open(full_path, "w") as fp:
-                fp.write(f"{data}\n")
+            write_file(full_path, f"{data}\n".encode())
             output_data[file_name] = data
 
     return output_data
@@ -864,6 +1378,8 @@ def init_cgroup_settings_from_parents(subsystem: str, *path: str, file_list: Opt
 
     Raises
     ------
+    CGroupLookupError
+        If a file does not exist or is not a file.
     ValueError
         If could not inherit the data from the subsystem's root path.
 
@@ -874,11 +1390,21 @@ def init_cgroup_settings_from_parents(subsystem: str, *path: str, file_list: Opt
     if file_list is None:
         file_list = cgroup_files(subsystem, *path)
 
-    files_data = init_cgroup_default(subsystem, default_data={name: None for name in file_list})
-    for n, d in files_data.items():
-        if d is None:
+    # The root data is only read, never written
+    files_data = {}
+    for n in file_list:
+        root_file_path = subsystem_path(subsystem, n)
+        try:
+            d = read_file(root_file_path).decode().strip()
+        except FileNotFoundError:
+            raise CGroupLookupError(None, CGroupLookupError.Type.NOT_EXISTS, root_file_path)
+        except IsADirectoryError:
+            raise CGroupLookupError(None, CGroupLookupError.Type.GROUP_INSTEAD_OF_FILE, root_file_path)
+        if not d:
             raise ValueError(f"No data is set for file {n} in {subsystem}'s root path.")
+        files_data[n] = d
 
-    path_list = pathlib.Path(*path).parts
+    # A single descending pass: each level inherits its parent's data (unless it is already set)
+    path_list = [part for p in path for part in p.split(os.path.sep) if part]
     for i in range(1, len(path_list) + 1):
         files_data = init_cgroup_default(subsystem, *path_list[:i], default_data=files_data)